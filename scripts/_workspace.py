@@ -0,0 +1,190 @@
+"""Shared workspace discovery for the scripts in this directory.
+
+Every script needs the same view of the workspace: which members exist, their
+parsed pyproject.toml data, and how they depend on each other. ``workspace()``
+builds that view once per process and hands the same object to every caller.
+"""
+
+import contextlib
+import functools
+import hashlib
+import os
+import pathlib
+import pickle
+import re
+import subprocess
+import sys
+import tomllib
+from collections import defaultdict
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+CACHE_DIR = ROOT / ".cache"
+
+# Directories that never hold workspace members; hidden directories are skipped too.
+SKIP_DIRS = frozenset({"node_modules", "__pycache__", "venv", "dist", "build", "target"})
+
+# A dependency's name ends at the first extras, version, marker or URL separator.
+_DEP_SEP = re.compile(r"[\s\[(<>=!~;@]")
+
+
+@functools.cache
+def _load_toml_cached(path_str: str) -> dict:
+    return tomllib.loads(pathlib.Path(path_str).read_text())
+
+
+def load_toml(path: pathlib.Path) -> dict:
+    """Parse a TOML file, reusing the result for repeat reads of the same path."""
+    return _load_toml_cached(str(path))
+
+
+def parse_dep_name(dep: str) -> str:
+    """Extract the base package name from a dependency specifier."""
+    return _DEP_SEP.split(dep.lstrip(), maxsplit=1)[0]
+
+
+def classify_member(toml_path: pathlib.Path) -> str | None:
+    """Return 'app' or 'lib' based on directory location."""
+    parts = toml_path.relative_to(ROOT).parts
+    if parts[0] == "apps":
+        return "app"
+    elif parts[0] == "libs":
+        return "lib"
+    return None
+
+
+def _walk_pyprojects(root: pathlib.Path) -> Iterator[pathlib.Path]:
+    """Yield pyproject.toml files below root (not root's own), pruning SKIP_DIRS."""
+    stack = [str(root)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS and not entry.name.startswith("."):
+                            stack.append(entry.path)
+                    elif entry.name == "pyproject.toml" and current != str(root):
+                        yield pathlib.Path(entry.path)
+        except OSError:
+            continue
+
+
+@functools.cache
+def find_pyprojects() -> tuple[pathlib.Path, ...]:
+    """Return every member pyproject.toml path, via git ls-files or a tree walk outside git."""
+    try:
+        result = subprocess.run(
+            ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard", "--", "*/pyproject.toml"],
+            capture_output=True,
+            cwd=ROOT,
+        )
+    except FileNotFoundError:
+        return tuple(sorted(_walk_pyprojects(ROOT)))
+    if result.returncode != 0:
+        return tuple(sorted(_walk_pyprojects(ROOT)))
+    # --others picks up members that haven't been added yet; is_file drops deleted ones still in the index.
+    paths = {ROOT / os.fsdecode(rel) for rel in result.stdout.split(b"\0") if rel}
+    return tuple(sorted(path for path in paths if path.is_file()))
+
+
+def discover_members() -> dict[str, pathlib.Path]:
+    """Return {package_name: pyproject.toml path} for all workspace members."""
+    paths = find_pyprojects()
+    # Reading is I/O-bound, so a thread pool overlaps the reads; results also warm the load_toml cache.
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as pool:
+        parsed = list(pool.map(load_toml, paths))
+
+    members: dict[str, pathlib.Path] = {}
+    for toml_path, data in zip(paths, parsed, strict=True):
+        name = data.get("project", {}).get("name")
+        if name:
+            # Interned so the dependency lookups below compare names by identity.
+            members[sys.intern(name)] = toml_path
+    return members
+
+
+def manifest_hash() -> str:
+    """Hash the path and mtime of every pyproject.toml, for keying on-disk caches."""
+    digest = hashlib.blake2b()
+    # This module is hashed too, so a pickled Workspace never outlives a change to its definition.
+    for path in [pathlib.Path(__file__), ROOT / "pyproject.toml", *find_pyprojects()]:
+        digest.update(f"{path}:{path.stat().st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def write_atomic(path: pathlib.Path, data: bytes) -> None:
+    """Write data to path through a temp file, so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def build_dep_graph(parsed: dict[str, dict]) -> dict[str, list[str]]:
+    """Build a dependency map: package -> workspace packages it depends on."""
+    workspace_names = frozenset(parsed.keys())
+    graph: dict[str, list[str]] = {}
+    for name, data in parsed.items():
+        graph[name] = []
+        for dep in data.get("project", {}).get("dependencies", []):
+            base = sys.intern(parse_dep_name(dep))
+            if base in workspace_names:
+                graph[name].append(base)
+    return graph
+
+
+def build_reverse_deps(graph: dict[str, list[str]]) -> dict[str, list[str]]:
+    """Build a reverse dependency map: package -> packages that depend on it."""
+    reverse: dict[str, list[str]] = defaultdict(list)
+    for name, deps in graph.items():
+        for dep in deps:
+            reverse[dep].append(name)
+    return reverse
+
+
+@dataclass(frozen=True)
+class Workspace:
+    members: dict[str, pathlib.Path]
+    names: frozenset[str]
+    parsed: dict[str, dict]
+    deps: dict[str, list[str]]
+    reverse_deps: dict[str, list[str]]
+    apps: frozenset[str]
+    libs: frozenset[str]
+
+
+def build_workspace() -> Workspace:
+    """Discover the workspace members and derive everything the scripts need from them."""
+    members = discover_members()
+    parsed = {name: load_toml(path) for name, path in members.items()}
+    deps = build_dep_graph(parsed)
+    kinds = {name: classify_member(path) for name, path in members.items()}
+    return Workspace(
+        members=members,
+        names=frozenset(members.keys()),
+        parsed=parsed,
+        deps=deps,
+        reverse_deps=build_reverse_deps(deps),
+        apps=frozenset(name for name, kind in kinds.items() if kind == "app"),
+        libs=frozenset(name for name, kind in kinds.items() if kind == "lib"),
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def workspace() -> Workspace:
+    """Return the workspace, built once per process and reused across runs until a pyproject.toml changes."""
+    cache_file = CACHE_DIR / f"workspace_{manifest_hash()}.pkl"
+    if cache_file.exists():
+        # Unpickling garbage can raise almost anything; a bad entry just means rebuilding it.
+        with contextlib.suppress(Exception):
+            return pickle.loads(cache_file.read_bytes())
+
+    ws = build_workspace()
+    with contextlib.suppress(OSError):
+        for stale in CACHE_DIR.glob("workspace_*.pkl"):
+            stale.unlink(missing_ok=True)
+        write_atomic(cache_file, pickle.dumps(ws))
+    return ws
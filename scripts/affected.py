@@ -9,8 +9,9 @@ Usage:
     python scripts/affected.py                     # diff vs origin/main
     python scripts/affected.py --base HEAD~1       # diff vs previous commit
     python scripts/affected.py --all               # force all packages
+    python scripts/affected.py --no-cache          # ignore and skip .cache/affected/
 
-Output:
+Output (indented on a terminal, compact single-line JSON when piped):
     {
       "all": false,
       "packages": ["shared"],
@@ -21,14 +22,16 @@ Output:
 """
 
 import argparse
+import contextlib
 import json
+import os
 import pathlib
 import subprocess
 import sys
-import tomllib
-from collections import defaultdict
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-ROOT = pathlib.Path(__file__).resolve().parent.parent
+from _workspace import CACHE_DIR, ROOT, find_pyprojects, manifest_hash, workspace, write_atomic
 
 # Files that, when changed, affect ALL packages.
 INFRA_PATTERNS = (
@@ -41,86 +44,85 @@ INFRA_PATTERNS = (
     ".pre-commit-config.yaml",
 )
 
+# Split once so is_infra_file is a set lookup plus one C-level startswith.
+# "pyproject.toml" is an exact match, so only the root one counts, not members'.
+_INFRA_FILES = frozenset(p for p in INFRA_PATTERNS if not p.endswith("/"))
+_INFRA_PREFIXES = tuple(p for p in INFRA_PATTERNS if p.endswith("/"))
 
-def load_toml(path: pathlib.Path) -> dict:
-    return tomllib.loads(path.read_text())
+# How many cached results to keep in .cache/affected/ for the current manifest hash.
+RESULT_CACHE_ENTRIES = 32
 
 
-def parse_dep_name(dep: str) -> str:
-    return dep.split("[")[0].split(">")[0].split("<")[0].split("=")[0].split("!")[0].split(";")[0].strip()
+def diff_pathspecs(pyprojects: tuple[pathlib.Path, ...]) -> list[str]:
+    """Return git pathspecs covering infra files and the top-level dirs of every member."""
+    member_roots = sorted({path.relative_to(ROOT).parts[0] for path in pyprojects})
+    return [*INFRA_PATTERNS, *member_roots]
 
 
-def discover_members() -> dict[str, pathlib.Path]:
-    """Return {package_name: pyproject.toml path} for all workspace members."""
-    members: dict[str, pathlib.Path] = {}
-    for toml_path in sorted(ROOT.rglob("*/pyproject.toml")):
-        if toml_path.parent == ROOT:
-            continue
-        data = load_toml(toml_path)
-        name = data.get("project", {}).get("name")
-        if name:
-            members[name] = toml_path
-    return members
+def get_changed_files(base: str, pathspecs: list[str]) -> list[str]:
+    """Get files changed relative to base ref.
 
-
-def build_reverse_deps(
-    members: dict[str, pathlib.Path],
-) -> dict[str, list[str]]:
-    """Build a reverse dependency map: package -> packages that depend on it."""
-    workspace_names = set(members.keys())
-    reverse: dict[str, list[str]] = defaultdict(list)
-    for name, path in members.items():
-        data = load_toml(path)
-        for dep in data.get("project", {}).get("dependencies", []):
-            base = parse_dep_name(dep)
-            if base in workspace_names:
-                reverse[base].append(name)
-    return reverse
-
-
-def get_changed_files(base: str) -> list[str]:
-    """Get files changed relative to base ref."""
-    result = subprocess.run(
-        ["git", "diff", "--name-only", base],
-        capture_output=True,
-        text=True,
+    The diff is read as git produces it and reading stops at the first infra
+    file (kept as the last entry), since that alone makes everything affected.
+    """
+    changed: list[str] = []
+    with subprocess.Popen(
+        ["git", "diff", "--name-only", "--no-renames", "-z", base, "--", *pathspecs],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
         cwd=ROOT,
-    )
-    if result.returncode != 0:
+    ) as proc:
+        assert proc.stdout is not None and proc.stderr is not None  # both are PIPEs
+        pending = b""
+        while chunk := os.read(proc.stdout.fileno(), 65536):
+            *paths, pending = (pending + chunk).split(b"\0")
+            for raw in paths:
+                filepath = os.fsdecode(raw)
+                changed.append(filepath)
+                if is_infra_file(filepath):
+                    proc.terminate()
+                    return changed
+        stderr = proc.stderr.read()
+    if proc.returncode != 0:
         print(
-            f"Warning: git diff failed: {result.stderr.strip()}",
+            f"Warning: git diff failed: {stderr.decode(errors='replace').strip()}",
             file=sys.stderr,
         )
         return []
-    return [f for f in result.stdout.strip().split("\n") if f]
+    return changed
 
 
 def is_infra_file(filepath: str) -> bool:
     """Check if a file is an infrastructure file that affects all packages."""
-    # Root-level pyproject.toml (not member ones)
-    if filepath == "pyproject.toml":
-        return True
-    return any(
-        filepath == pattern or filepath.startswith(pattern) for pattern in INFRA_PATTERNS if pattern != "pyproject.toml"
-    )
+    return filepath in _INFRA_FILES or filepath.startswith(_INFRA_PREFIXES)
+
+
+def build_package_index(members: dict[str, pathlib.Path]) -> dict[tuple[str, ...], str]:
+    """Map each package dir, as a tuple of path parts, to its package name."""
+    return {toml_path.parent.relative_to(ROOT).parts: name for name, toml_path in members.items()}
 
 
-def file_to_package(filepath: str, members: dict[str, pathlib.Path]) -> str | None:
+def file_to_package(filepath: str, index: dict[tuple[str, ...], str]) -> str | None:
     """Map a changed file to its owning workspace package."""
-    for name, toml_path in members.items():
-        pkg_dir = str(toml_path.parent.relative_to(ROOT))
-        if filepath.startswith(pkg_dir + "/") or filepath == pkg_dir:
+    file_parts = tuple(filepath.split("/"))
+    # Member dirs can nest (e.g. a test fixture project inside a lib), so try the
+    # longest leading run of components first; the innermost enclosing member owns the file.
+    # Whole components are compared, so libs/foo never claims libs/foo-bar.
+    for depth in range(len(file_parts), 0, -1):
+        name = index.get(file_parts[:depth])
+        if name is not None:
             return name
     return None
 
 
 def expand_dependents(changed: set[str], reverse_deps: dict[str, list[str]]) -> set[str]:
     """Expand changed set to include all transitive dependents."""
+    # result doubles as the visited set for the breadth-first walk.
     result = set(changed)
-    queue = list(changed)
+    queue = deque(result)
     while queue:
-        pkg = queue.pop()
-        for dependent in reverse_deps.get(pkg, []):
+        pkg = queue.popleft()
+        for dependent in reverse_deps.get(pkg, ()):
             if dependent not in result:
                 result.add(dependent)
                 queue.append(dependent)
@@ -157,6 +159,84 @@ def build_output(
     }
 
 
+def format_output(output: dict) -> str:
+    """Serialize output, skipping indentation when stdout is a pipe rather than a terminal."""
+    if sys.stdout.isatty():
+        return json.dumps(output, indent=2)
+    return json.dumps(output, separators=(",", ":"))
+
+
+def resolve_commit(rev: str) -> str | None:
+    """Return the commit SHA rev names, or None if it isn't exactly one commit (e.g. a range)."""
+    result = subprocess.run(
+        ["git", "rev-parse", "--verify", "--end-of-options", f"{rev}^{{commit}}"],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+    )
+    shas = result.stdout.split()
+    if result.returncode != 0 or len(shas) != 1:
+        return None
+    return shas[0]
+
+
+def result_cache_path(base: str) -> pathlib.Path | None:
+    """Return the cache file for diffing base against HEAD, or None if the result can't be cached."""
+    base_sha = resolve_commit(base)
+    head_sha = resolve_commit("HEAD")
+    if base_sha is None or head_sha is None:
+        return None
+    # git diff <base> also sees uncommitted edits, which the commit SHAs don't capture.
+    if subprocess.run(["git", "diff", "--quiet", "HEAD"], cwd=ROOT).returncode != 0:
+        return None
+    return CACHE_DIR / "affected" / f"{base_sha}_{head_sha}_{manifest_hash()}.json"
+
+
+def write_result_cache(cache_file: pathlib.Path, output: dict) -> None:
+    """Store output in cache_file, pruning entries that can no longer (or are unlikely to) be hit."""
+    manifest = cache_file.stem.rsplit("_", 1)[1]
+    with contextlib.suppress(OSError):
+        write_atomic(cache_file, json.dumps(output).encode())
+        # Entries keyed by another manifest hash are dead; of the rest, keep only the newest few.
+        live = []
+        for entry in cache_file.parent.glob("*.json"):
+            if entry.stem.endswith(f"_{manifest}"):
+                live.append((entry.stat().st_mtime_ns, entry))
+            else:
+                entry.unlink(missing_ok=True)
+        live.sort(reverse=True)
+        for _, stale in live[RESULT_CACHE_ENTRIES:]:
+            stale.unlink(missing_ok=True)
+
+
+def detect_affected(base: str) -> dict:
+    """Diff against base and build the output for the affected packages."""
+    # Member roots come from the same pyproject listing discovery uses, so both agree on
+    # what a member is. git diff then runs in its own process while the workspace is parsed.
+    pathspecs = diff_pathspecs(find_pyprojects())
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        changed_future = pool.submit(get_changed_files, base, pathspecs)
+        ws = workspace()
+        changed_files = changed_future.result()
+    members = ws.members
+
+    # Check for infra changes
+    infra_changed = any(is_infra_file(f) for f in changed_files)
+
+    if infra_changed:
+        return build_output(members, set(members.keys()), run_all=True)
+
+    index = build_package_index(members)
+    directly_changed: set[str] = set()
+    for f in changed_files:
+        pkg = file_to_package(f, index)
+        if pkg:
+            directly_changed.add(pkg)
+
+    affected = expand_dependents(directly_changed, ws.reverse_deps)
+    return build_output(members, affected, run_all=False)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Detect affected workspace packages")
     parser.add_argument(
@@ -170,34 +250,28 @@ def main() -> None:
         dest="force_all",
         help="Force all packages to be affected",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Neither read nor write the on-disk result cache",
+    )
     args = parser.parse_args()
 
-    members = discover_members()
-
     if args.force_all:
+        members = workspace().members
         output = build_output(members, set(members.keys()), run_all=True)
-        print(json.dumps(output, indent=2))
+        print(format_output(output))
         return
 
-    changed_files = get_changed_files(args.base)
-
-    # Check for infra changes
-    infra_changed = any(is_infra_file(f) for f in changed_files)
-
-    if infra_changed:
-        output = build_output(members, set(members.keys()), run_all=True)
+    cache_file = None if args.no_cache else result_cache_path(args.base)
+    if cache_file is not None and cache_file.exists():
+        output = json.loads(cache_file.read_text())
     else:
-        directly_changed: set[str] = set()
-        for f in changed_files:
-            pkg = file_to_package(f, members)
-            if pkg:
-                directly_changed.add(pkg)
-
-        reverse_deps = build_reverse_deps(members)
-        affected = expand_dependents(directly_changed, reverse_deps)
-        output = build_output(members, affected, run_all=False)
+        output = detect_affected(args.base)
+        if cache_file is not None:
+            write_result_cache(cache_file, output)
 
-    print(json.dumps(output, indent=2))
+    print(format_output(output))
 
 
 if __name__ == "__main__":
@@ -17,160 +17,151 @@ Checks:
 
 import pathlib
 import sys
-import tomllib
 from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass
 
-ROOT = pathlib.Path(__file__).resolve().parent.parent
-REQUIRED_BUILD_BACKEND = "uv_build"
-
-
-def load_toml(path: pathlib.Path) -> dict:
-    return tomllib.loads(path.read_text())
+from _workspace import ROOT, load_toml, parse_dep_name, workspace
 
+REQUIRED_BUILD_BACKEND = "uv_build"
 
-def get_root_config() -> dict:
-    return load_toml(ROOT / "pyproject.toml")
 
+@dataclass(frozen=True)
+class CheckContext:
+    """Workspace-wide facts the per-member checks compare against."""
 
-def discover_members() -> dict[str, pathlib.Path]:
-    """Return {package_name: pyproject.toml path} for all workspace members."""
-    members: dict[str, pathlib.Path] = {}
-    for toml_path in sorted(ROOT.rglob("*/pyproject.toml")):
-        if toml_path.parent == ROOT:
-            continue
-        data = load_toml(toml_path)
-        name = data.get("project", {}).get("name")
-        if name:
-            members[name] = toml_path
-    return members
+    workspace_names: frozenset[str]
+    app_names: frozenset[str]
+    lib_names: frozenset[str]
+    deps: dict[str, list[str]]
+    root_requires: str
 
 
-def classify_member(toml_path: pathlib.Path) -> str | None:
-    """Return 'app' or 'lib' based on directory location."""
-    rel = toml_path.relative_to(ROOT)
-    parts = rel.parts
-    if parts[0] == "apps":
-        return "app"
-    elif parts[0] == "libs":
-        return "lib"
-    return None
+MemberCheck = Callable[[str, pathlib.Path, dict, CheckContext], list[str]]
 
 
-def parse_dep_name(dep: str) -> str:
-    """Extract the base package name from a dependency specifier."""
-    return dep.split("[")[0].split(">")[0].split("<")[0].split("=")[0].split("!")[0].split(";")[0].strip()
+def get_root_config() -> dict:
+    return load_toml(ROOT / "pyproject.toml")
 
 
-def check_no_external_deps(members: dict[str, pathlib.Path], workspace_names: set[str]) -> list[str]:
+def check_no_external_deps(name: str, path: pathlib.Path, data: dict, ctx: CheckContext) -> list[str]:
     """Check 1: members may only depend on other workspace members."""
     errors = []
-    for name, path in members.items():
-        data = load_toml(path)
-        for dep in data.get("project", {}).get("dependencies", []):
-            base = parse_dep_name(dep)
-            if base not in workspace_names:
-                rel = path.relative_to(ROOT)
-                errors.append(f"{name}: external dependency '{dep}' must be in root pyproject.toml, not {rel}")
+    for dep in data.get("project", {}).get("dependencies", []):
+        base = parse_dep_name(dep)
+        if base not in ctx.workspace_names:
+            rel = path.relative_to(ROOT)
+            errors.append(f"{name}: external dependency '{dep}' must be in root pyproject.toml, not {rel}")
     return errors
 
 
-def check_no_member_python_version(members: dict[str, pathlib.Path]) -> list[str]:
+def check_no_member_python_version(name: str, path: pathlib.Path, data: dict, ctx: CheckContext) -> list[str]:
     """Check 2: no member-level .python-version files."""
-    errors = []
-    for name, path in members.items():
-        pyver = path.parent / ".python-version"
-        if pyver.exists():
-            errors.append(f"{name}: remove {pyver.relative_to(ROOT)} — use the root .python-version only")
-    return errors
+    pyver = path.parent / ".python-version"
+    if pyver.exists():
+        return [f"{name}: remove {pyver.relative_to(ROOT)} — use the root .python-version only"]
+    return []
 
 
-def check_requires_python(members: dict[str, pathlib.Path], root_requires: str) -> list[str]:
+def check_requires_python(name: str, path: pathlib.Path, data: dict, ctx: CheckContext) -> list[str]:
     """Check 3: requires-python must match root."""
-    errors = []
-    for name, path in members.items():
-        data = load_toml(path)
-        member_req = data.get("project", {}).get("requires-python", "")
-        if member_req and member_req != root_requires:
-            errors.append(f"{name}: requires-python '{member_req}' doesn't match root '{root_requires}'")
-    return errors
+    member_req = data.get("project", {}).get("requires-python", "")
+    if member_req and member_req != ctx.root_requires:
+        return [f"{name}: requires-python '{member_req}' doesn't match root '{ctx.root_requires}'"]
+    return []
 
 
-def check_no_cycles(members: dict[str, pathlib.Path], workspace_names: set[str]) -> list[str]:
+def _trace_cycle(start: str, graph: dict[str, list[str]], component: set[str]) -> list[str]:
+    """Follow edges inside a strongly connected component until a member repeats."""
+    # depth records each node's position in path, so closing the cycle is a dict lookup.
+    path: list[str] = []
+    depth: dict[str, int] = {}
+    node = start
+    while node not in depth:
+        depth[node] = len(path)
+        path.append(node)
+        # Self-dependencies are reported separately, so step to another member.
+        node = next(dep for dep in graph[node] if dep in component and dep != node)
+    return [*path[depth[node] :], node]
+
+
+def check_no_cycles(graph: dict[str, list[str]]) -> list[str]:
     """Check 4: no circular dependencies between workspace members."""
-    # Build adjacency list
-    graph: dict[str, list[str]] = defaultdict(list)
-    for name, path in members.items():
-        data = load_toml(path)
-        for dep in data.get("project", {}).get("dependencies", []):
-            base = parse_dep_name(dep)
-            if base in workspace_names:
-                graph[name].append(base)
-
-    # DFS cycle detection
-    visited: set[str] = set()
-    in_stack: set[str] = set()
+    # Without any workspace-internal edges there is nothing to traverse.
+    if not any(graph.values()):
+        return []
+
+    # Iterative Tarjan SCC: every component with more than one member is a
+    # cycle, and so is every member that depends on itself.
+    index: dict[str, int] = {}
+    lowlink: dict[str, int] = {}
+    on_stack: set[str] = set()
+    scc_stack: list[str] = []
     cycles: list[str] = []
 
-    def dfs(node: str, path: list[str]) -> None:
-        if node in in_stack:
-            cycle_start = path.index(node)
-            cycle = " → ".join([*path[cycle_start:], node])
-            cycles.append(f"circular dependency: {cycle}")
-            return
-        if node in visited:
-            return
-        visited.add(node)
-        in_stack.add(node)
-        path.append(node)
-        for neighbor in graph.get(node, []):
-            dfs(neighbor, path)
-        path.pop()
-        in_stack.remove(node)
-
-    for name in members:
-        if name not in visited:
-            dfs(name, [])
+    for root in graph:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        scc_stack.append(root)
+        on_stack.add(root)
+        frames = [(root, iter(graph.get(root, [])))]
+        while frames:
+            node, neighbors = frames[-1]
+            for neighbor in neighbors:
+                if neighbor not in index:
+                    index[neighbor] = lowlink[neighbor] = len(index)
+                    scc_stack.append(neighbor)
+                    on_stack.add(neighbor)
+                    frames.append((neighbor, iter(graph.get(neighbor, []))))
+                    break
+                if neighbor in on_stack:
+                    lowlink[node] = min(lowlink[node], index[neighbor])
+            else:
+                frames.pop()
+                if frames:
+                    parent = frames[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component: list[str] = []
+                    while True:
+                        member = scc_stack.pop()
+                        on_stack.remove(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1:
+                        cycle = _trace_cycle(min(component), graph, set(component))
+                        message = f"circular dependency: {' → '.join(cycle)}"
+                        # The traced loop need not visit the whole component; name the rest too.
+                        missed = sorted(set(component).difference(cycle))
+                        if missed:
+                            message += f" (cycle also involves {', '.join(missed)})"
+                        cycles.append(message)
+                    # A self-dependency is its own cycle, even inside a larger component.
+                    for member in sorted(component):
+                        if member in graph.get(member, []):
+                            cycles.append(f"circular dependency: {member} → {member}")
 
     return cycles
 
 
-def check_build_backend(members: dict[str, pathlib.Path]) -> list[str]:
+def check_build_backend(name: str, path: pathlib.Path, data: dict, ctx: CheckContext) -> list[str]:
     """Check 5: all members must use the same build-backend."""
-    errors = []
-    for name, path in members.items():
-        data = load_toml(path)
-        backend = data.get("build-system", {}).get("build-backend", "")
-        if backend != REQUIRED_BUILD_BACKEND:
-            errors.append(f"{name}: build-backend is '{backend}', expected '{REQUIRED_BUILD_BACKEND}'")
-    return errors
+    backend = data.get("build-system", {}).get("build-backend", "")
+    if backend != REQUIRED_BUILD_BACKEND:
+        return [f"{name}: build-backend is '{backend}', expected '{REQUIRED_BUILD_BACKEND}'"]
+    return []
 
 
-def check_dependency_direction(members: dict[str, pathlib.Path], workspace_names: set[str]) -> list[str]:
+def check_dependency_direction(name: str, path: pathlib.Path, data: dict, ctx: CheckContext) -> list[str]:
     """Check 6 & 7: apps can only depend on libs; libs cannot depend on apps."""
     errors = []
-    app_names = set()
-    lib_names = set()
-
-    for name, path in members.items():
-        kind = classify_member(path)
-        if kind == "app":
-            app_names.add(name)
-        elif kind == "lib":
-            lib_names.add(name)
-
-    for name, path in members.items():
-        kind = classify_member(path)
-        data = load_toml(path)
-        for dep in data.get("project", {}).get("dependencies", []):
-            base = parse_dep_name(dep)
-            if base not in workspace_names:
-                continue
-            if kind == "app" and base in app_names:
-                errors.append(
-                    f"{name} (app): cannot depend on '{base}' (another app) — apps should only depend on libs"
-                )
-            if kind == "lib" and base in app_names:
-                errors.append(f"{name} (lib): cannot depend on '{base}' (an app) — libs must not depend on apps")
+    for base in ctx.deps[name]:
+        if name in ctx.app_names and base in ctx.app_names:
+            errors.append(f"{name} (app): cannot depend on '{base}' (another app) — apps should only depend on libs")
+        if name in ctx.lib_names and base in ctx.app_names:
+            errors.append(f"{name} (lib): cannot depend on '{base}' (an app) — libs must not depend on apps")
     return errors
 
 
@@ -184,74 +175,106 @@ def check_no_root_sources() -> list[str]:
     return []
 
 
-def check_no_member_tool_overrides(members: dict[str, pathlib.Path]) -> list[str]:
+def check_no_member_tool_overrides(name: str, path: pathlib.Path, data: dict, ctx: CheckContext) -> list[str]:
     """Check 9: members should not override [tool.ruff] or [tool.pytest]."""
     errors = []
-    for name, path in members.items():
-        data = load_toml(path)
-        tool = data.get("tool", {})
-        if "ruff" in tool:
-            errors.append(f"{name}: remove [tool.ruff] — ruff config must be in root pyproject.toml only")
-        if "pytest" in tool:
-            errors.append(f"{name}: remove [tool.pytest] — pytest config must be in root pyproject.toml only")
+    tool = data.get("tool", {})
+    if "ruff" in tool:
+        errors.append(f"{name}: remove [tool.ruff] — ruff config must be in root pyproject.toml only")
+    if "pytest" in tool:
+        errors.append(f"{name}: remove [tool.pytest] — pytest config must be in root pyproject.toml only")
     return errors
 
 
-def check_no_member_optional_deps(members: dict[str, pathlib.Path]) -> list[str]:
+def check_no_member_optional_deps(name: str, path: pathlib.Path, data: dict, ctx: CheckContext) -> list[str]:
     """Check 10: members should not have [project.optional-dependencies]."""
-    errors = []
-    for name, path in members.items():
-        data = load_toml(path)
-        if data.get("project", {}).get("optional-dependencies"):
-            errors.append(
-                f"{name}: remove [project.optional-dependencies] — extras must be centralized in root pyproject.toml"
-            )
-    return errors
+    if data.get("project", {}).get("optional-dependencies"):
+        return [f"{name}: remove [project.optional-dependencies] — extras must be centralized in root pyproject.toml"]
+    return []
 
 
-def check_naming_convention(members: dict[str, pathlib.Path]) -> list[str]:
+def check_naming_convention(name: str, path: pathlib.Path, data: dict, ctx: CheckContext) -> list[str]:
     """Check 11: package names must match their directory name."""
-    errors = []
+    expected_dir_name = path.parent.name
+    if name != expected_dir_name:
+        return [f"{name}: package name doesn't match directory name '{expected_dir_name}'"]
+    return []
+
+
+# Checks that only look at one member at a time, run together in a single pass.
+MEMBER_CHECKS: list[tuple[str, MemberCheck]] = [
+    ("External Dependencies", check_no_external_deps),
+    ("Python Version Files", check_no_member_python_version),
+    ("Python Version Spec", check_requires_python),
+    ("Build Backend", check_build_backend),
+    ("Dependency Direction", check_dependency_direction),
+    ("Tool Config Overrides", check_no_member_tool_overrides),
+    ("Optional Dependencies", check_no_member_optional_deps),
+    ("Naming Convention", check_naming_convention),
+]
+
+REPORT_ORDER = (
+    "External Dependencies",
+    "Python Version Files",
+    "Python Version Spec",
+    "Circular Dependencies",
+    "Build Backend",
+    "Dependency Direction",
+    "Root Sources",
+    "Tool Config Overrides",
+    "Optional Dependencies",
+    "Naming Convention",
+)
+
+
+def run_member_checks(
+    members: dict[str, pathlib.Path],
+    parsed: dict[str, dict],
+    ctx: CheckContext,
+) -> dict[str, list[str]]:
+    """Run every per-member check over each member, grouping errors by check label."""
+    errors: dict[str, list[str]] = defaultdict(list)
     for name, path in members.items():
-        expected_dir_name = path.parent.name
-        if name != expected_dir_name:
-            errors.append(f"{name}: package name doesn't match directory name '{expected_dir_name}'")
+        data = parsed[name]
+        for label, check in MEMBER_CHECKS:
+            errors[label].extend(check(name, path, data, ctx))
     return errors
 
 
 def main() -> None:
     root_data = get_root_config()
-    root_requires = root_data.get("project", {}).get("requires-python", "")
-    members = discover_members()
-    workspace_names = set(members.keys())
+    ws = workspace()
+    ctx = CheckContext(
+        workspace_names=ws.names,
+        app_names=ws.apps,
+        lib_names=ws.libs,
+        deps=ws.deps,
+        root_requires=root_data.get("project", {}).get("requires-python", ""),
+    )
+
+    checks = run_member_checks(ws.members, ws.parsed, ctx)
+    checks["Circular Dependencies"] = check_no_cycles(ws.deps)
+    checks["Root Sources"] = check_no_root_sources()
 
     all_errors: list[str] = []
+    lines: list[str] = []
 
-    checks = [
-        ("External Dependencies", check_no_external_deps(members, workspace_names)),
-        ("Python Version Files", check_no_member_python_version(members)),
-        ("Python Version Spec", check_requires_python(members, root_requires)),
-        ("Circular Dependencies", check_no_cycles(members, workspace_names)),
-        ("Build Backend", check_build_backend(members)),
-        ("Dependency Direction", check_dependency_direction(members, workspace_names)),
-        ("Root Sources", check_no_root_sources()),
-        ("Tool Config Overrides", check_no_member_tool_overrides(members)),
-        ("Optional Dependencies", check_no_member_optional_deps(members)),
-        ("Naming Convention", check_naming_convention(members)),
-    ]
-
-    for label, errors in checks:
+    for label in REPORT_ORDER:
+        errors = checks[label]
         if errors:
-            print(f"\n── {label} ──")
-            for err in errors:
-                print(f"  ❌ {err}")
+            lines.append(f"\n── {label} ──")
+            lines.extend(f"  ❌ {err}" for err in errors)
             all_errors.extend(errors)
 
     if all_errors:
-        print(f"\n💡 {len(all_errors)} issue(s) found. Fix the errors above.")
-        sys.exit(1)
+        lines.append(f"\n💡 {len(all_errors)} issue(s) found. Fix the errors above.")
     else:
-        print("✅ All workspace checks passed.")
+        lines.append("✅ All workspace checks passed.")
+
+    # One write for the whole report instead of a print per line.
+    sys.stdout.write("\n".join(lines) + "\n")
+    if all_errors:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
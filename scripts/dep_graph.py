@@ -4,87 +4,37 @@
 Outputs the graph to stdout and optionally writes docs/dependency-graph.md.
 """
 
-import pathlib
-import tomllib
+from _workspace import ROOT, workspace
 
-ROOT = pathlib.Path(__file__).resolve().parent.parent
+STYLES = (
+    "    classDef app fill:#4a9eff,stroke:#2670c4,color:#fff",
+    "    classDef lib fill:#50c878,stroke:#2e8b57,color:#fff",
+)
 
 
-def load_toml(path: pathlib.Path) -> dict:
-    return tomllib.loads(path.read_text())
-
-
-def discover_members() -> dict[str, pathlib.Path]:
-    members: dict[str, pathlib.Path] = {}
-    for toml_path in sorted(ROOT.rglob("*/pyproject.toml")):
-        if toml_path.parent == ROOT:
-            continue
-        data = load_toml(toml_path)
-        name = data.get("project", {}).get("name")
-        if name:
-            members[name] = toml_path
-    return members
-
-
-def classify(toml_path: pathlib.Path) -> str:
-    rel = toml_path.relative_to(ROOT)
-    if rel.parts[0] == "apps":
-        return "app"
-    return "lib"
-
-
-def parse_dep_name(dep: str) -> str:
-    return dep.split("[")[0].split(">")[0].split("<")[0].split("=")[0].split("!")[0].split(";")[0].strip()
+def subgraph(title: str, names: list[str], css_class: str) -> list[str]:
+    """Return the Mermaid lines for one styled subgraph, or nothing if it's empty."""
+    if not names:
+        return []
+    return [f"    subgraph {title}", *(f"        {name}[{name}]:::{css_class}" for name in names), "    end"]
 
 
 def build_graph() -> str:
-    members = discover_members()
-    workspace_names = set(members.keys())
-
-    # Classify members
-    apps: list[str] = []
-    libs: list[str] = []
-    for name, path in members.items():
-        if classify(path) == "app":
-            apps.append(name)
-        else:
-            libs.append(name)
-
-    # Build edges
-    edges: list[tuple[str, str]] = []
-    for name, path in members.items():
-        data = load_toml(path)
-        for dep in data.get("project", {}).get("dependencies", []):
-            base = parse_dep_name(dep)
-            if base in workspace_names:
-                edges.append((name, base))
-
-    # Generate Mermaid
-    lines = ["graph TD"]
-
-    # Style subgraphs
-    if apps:
-        lines.append("    subgraph Apps")
-        for app in sorted(apps):
-            lines.append(f"        {app}[{app}]:::app")
-        lines.append("    end")
-
-    if libs:
-        lines.append("    subgraph Libs")
-        for lib in sorted(libs):
-            lines.append(f"        {lib}[{lib}]:::lib")
-        lines.append("    end")
-
-    # Edges
-    for src, dst in sorted(edges):
-        lines.append(f"    {src} --> {dst}")
-
-    # Styling
-    lines.append("")
-    lines.append("    classDef app fill:#4a9eff,stroke:#2670c4,color:#fff")
-    lines.append("    classDef lib fill:#50c878,stroke:#2e8b57,color:#fff")
-
-    return "\n".join(lines)
+    ws = workspace()
+    apps = sorted(ws.apps)
+    libs = sorted(ws.names - ws.apps)
+    edges = sorted((name, dep) for name, deps in ws.deps.items() for dep in deps)
+
+    return "\n".join(
+        [
+            "graph TD",
+            *subgraph("Apps", apps, "app"),
+            *subgraph("Libs", libs, "lib"),
+            *(f"    {src} --> {dst}" for src, dst in edges),
+            "",
+            *STYLES,
+        ]
+    )
 
 
 def main() -> None: